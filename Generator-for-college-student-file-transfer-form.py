@@ -4,20 +4,73 @@
 import sys
 import os
 import re
+import multiprocessing
+import queue
+import threading
+import uuid
+import importlib.util
+from collections import deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
+from io import BytesIO
 from pathlib import Path
-import pandas as pd
-import numpy as np
-from docx import Document
+from zipfile import ZipFile, ZIP_DEFLATED, ZIP_STORED
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
-                             QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem,
+                             QHBoxLayout, QPushButton, QTableView,
                              QFileDialog, QMessageBox, QTabWidget, QLabel, QLineEdit,
                              QGridLayout, QGroupBox, QHeaderView, QAbstractItemView,
                              QDialog, QDialogButtonBox, QFormLayout, QComboBox,
                              QProgressDialog, QTextEdit, QScrollArea)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtCore import Qt, QThread, pyqtSignal, QAbstractTableModel, QModelIndex
 from PyQt6.QtGui import QFont, QTextCursor
 
+# pandas、numpy、python-docx、openpyxl导入较慢，在首次用到时才导入，缩短程序启动时间
+
+# 可选依赖：安装python-calamine后使用calamine引擎读取Excel，速度快很多
+_CALAMINE_AVAILABLE = importlib.util.find_spec('python_calamine') is not None
+
+# 模板占位符 {{字段名}}
+_PLACEHOLDER_RE = re.compile(r'\{\{(\w+)\}\}')
+# 日期开头的“年/月/日”或“年-月-日”
+_DATE_PARTS_RE = re.compile(r'^\s*(\d+)([/-])(\d+)\2(\d+)')
+# 文件名中不允许出现的字符
+_ILLEGAL_FILENAME_TRANS = str.maketrans(dict.fromkeys('<>:"/\\|?*', '_'))
+# 按文本读取的列，避免学号、身份证号、手机号被转换为数字
+_TEXT_COLUMNS = ('学号', '身份证号', '手机号')
+# 组成输出文件名的字段，依次为 学号_姓名_班级.docx
+_FILENAME_FIELDS = ('学号', '姓名', '班级')
+# 常用的档案转递类型
+_TRANSFER_TYPES = ('转回生源地', '签约单位接收', '托管单位接收', '升学外校接收')
+# 字段输入框的 (提示文字, 悬停提示)，未列出的字段提示“请输入字段名”
+_FIELD_HINTS = {
+    '届': ('如：2023', None),
+    '年': ('如：2025', None),
+    '月': ('如：7', None),
+    '日': ('如：15', None),
+    '档案转递类型': ('请输入档案转递类型', '常用类型：' + '、'.join(_TRANSFER_TYPES)),
+}
+# 保存docx时的压缩级别：1级保存速度约为默认6级的2.5倍，文件大约大两成
+_DOCX_COMPRESS_LEVEL = 1
+# w:t文本写入XML时需要转义的字符，与lxml序列化的结果一致
+_XML_TEXT_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+# 与python-docx的Run.text相同：换行、回车转为<w:br/>，制表符转为<w:tab/>
+# （{w}为w:t节点的命名空间前缀加冒号，使用默认命名空间时为空）
+_XML_RUN_BREAKS = {
+    '\n': '</{w}t><{w}br/><{w}t xml:space="preserve">',
+    '\r': '</{w}t><{w}br/><{w}t xml:space="preserve">',
+    '\t': '</{w}t><{w}tab/><{w}t xml:space="preserve">',
+}
+# XML中不允许出现的控制字符
+_XML_ILLEGAL_CHARS_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+# 模板XML中用到的元素名和属性名（与docx.oxml.ns.qn的结果相同），解析时不必导入python-docx
+_W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_W_P = _W_NS + 'p'
+_W_T = _W_NS + 't'
+_XML_SPACE = '{http://www.w3.org/XML/1998/namespace}space'
+# 本身已经压缩过的媒体文件，写入docx时直接存储
+_STORED_MEDIA_SUFFIXES = ('.png', '.jpg', '.jpeg', '.gif', '.tif', '.tiff', '.wdp', '.mp3', '.mp4')
+
 class MissingFieldsDialog(QDialog):
     """缺失字段填写对话框"""
     def __init__(self, missing_fields, row_info, parent=None):
@@ -43,34 +96,10 @@ class MissingFieldsDialog(QDialog):
             line_edit = QLineEdit()
             
             # 根据字段名称设置提示文本
-            if field == '年':
-                line_edit.setPlaceholderText('如：2025')
-            elif field == '月':
-                line_edit.setPlaceholderText('如：7')
-            elif field == '日':
-                line_edit.setPlaceholderText('如：15')
-            elif field == '届':
-                line_edit.setPlaceholderText('如：2023')
-            elif field == '身份证号':
-                line_edit.setPlaceholderText('请输入身份证号')
-            elif field == '收档单位名称':
-                line_edit.setPlaceholderText('请输入收档单位名称')
-            elif field == '转递编号':
-                line_edit.setPlaceholderText('请输入转递编号')
-            elif field == '生源地':
-                line_edit.setPlaceholderText('请输入生源地')
-            elif field == '手机号':
-                line_edit.setPlaceholderText('请输入手机号')
-            elif field == '档案转递类型':
-                line_edit.setPlaceholderText('请输入档案转递类型')
-                # 添加提示信息
-                line_edit.setToolTip('常用类型：转回生源地、签约单位接收、托管单位接收、升学外校接收')
-            elif field == '就业单位名称':
-                line_edit.setPlaceholderText('请输入就业单位名称')
-            elif field == '就业单位地址':
-                line_edit.setPlaceholderText('请输入就业单位地址')
-            else:
-                line_edit.setPlaceholderText(f'请输入{field}')
+            placeholder, tooltip = _FIELD_HINTS.get(field, (f'请输入{field}', None))
+            line_edit.setPlaceholderText(placeholder)
+            if tooltip:
+                line_edit.setToolTip(tooltip)
             
             self.fields[field] = line_edit
             form_layout.addRow(f"{field}:", line_edit)
@@ -102,248 +131,557 @@ class MissingFieldsDialog(QDialog):
             values[field] = value
         return values
 
+class TemplateRenderer:
+    """Word模板渲染器 - 模板只解析一次，可为多行数据重复生成文档"""
+    
+    def __init__(self, template_bytes):
+        from docx import Document
+        
+        self.fields = {}
+        
+        # 模板文档只加载一次，编译完成后不再保留
+        doc = Document(BytesIO(template_bytes))
+        program = self.compile_template(doc.element.body)
+        # 每个节点的格式字符串和转义表，换行、制表符的标签使用节点自身的命名空间前缀
+        escapes = {}
+        self.formats = [(fmt, escapes.setdefault(t.prefix, self.text_escapes(t.prefix))) for t, fmt in program]
+        # 模板中出现的全部字段
+        self.variables = frozenset(self.fields)
+        # 行中没有的字段保留占位符原样，占位符文本预先生成
+        self.placeholders = {alias: '{{' + key + '}}' for key, alias in self.fields.items()}
+        
+        # 由python-docx保存一次得到完整的文档包，之后只有正文部件会变化，其余部件直接复用
+        buffer = BytesIO()
+        doc.save(buffer)
+        with ZipFile(buffer) as package:
+            self.package_parts = [
+                (name, package.read(name),
+                 ZIP_STORED if name.lower().endswith(_STORED_MEDIA_SUFFIXES) else ZIP_DEFLATED)
+                for name in package.namelist()
+            ]
+        self.document_partname = doc.part.partname.membername
+        self.document_pieces = self.split_document_xml(doc, program)
+    
+    def compile_template(self, body):
+        """把模板编译为替换程序
+        
+        返回 [(w:t节点, 格式字符串), ...]，覆盖正文和表格内的段落，按节点在文档中的位置排序。
+        生成时每个节点只需一次format_map。
+        """
+        program = []
+        for p in body.iter(_W_P):
+            t_nodes = self.paragraph_text_nodes(p)
+            texts = [t.text or '' for t in t_nodes]
+            full_text = ''.join(texts)
+            if '{{' not in full_text:
+                continue
+            
+            matches = list(_PLACEHOLDER_RE.finditer(full_text))
+            if not matches:
+                continue
+            
+            # 字段统一改用别名引用，避免字段名被format当作位置参数或属性
+            fields = ['{' + self.fields.setdefault(m.group(1), f'_{len(self.fields)}') + '}' for m in matches]
+            formats = self.substitute_runs(texts, full_text, matches, fields)
+            program.extend((t, fmt) for t, text, fmt in zip(t_nodes, texts, formats)
+                           if fmt != self.escape_format(text))
+        
+        # 段落按嵌套关系逐个处理，而文本框的段落位于所在段落的run之中，
+        # 节点需按文档顺序排列，才能与序列化后XML中的位置一一对应
+        position = {t: i for i, t in enumerate(body.iter(_W_T))}
+        program.sort(key=lambda item: position[item[0]])
+        return program
+    
+    @staticmethod
+    def split_document_xml(doc, program):
+        """在占位符节点处切开正文部件的XML（UTF-8字节）
+        
+        生成时把各节点的新文本与这些片段直接拼接，不再修改和序列化XML树，
+        也不必每次把整个正文重新编码。
+        """
+        mark = f'\ue000{uuid.uuid4().hex}\ue000'
+        for t, _ in program:
+            t.text = mark
+            # 替换后的文字可能带有首尾空白，统一声明保留
+            t.set(_XML_SPACE, 'preserve')
+        pieces = doc.part.blob.split(mark.encode('utf-8'))
+        if len(pieces) != len(program) + 1:
+            raise ValueError("模板正文无法解析")
+        return pieces
+    
+    @staticmethod
+    def text_escapes(prefix):
+        """替换文本写入w:t节点时的转义表，prefix为节点的命名空间前缀（默认命名空间时为None）"""
+        w = f'{prefix}:' if prefix else ''
+        return {**_XML_TEXT_ESCAPES,
+                **str.maketrans({char: tags.format(w=w) for char, tags in _XML_RUN_BREAKS.items()})}
+    
+    @staticmethod
+    def paragraph_text_nodes(p):
+        """段落自身的全部w:t节点，包括超链接、内容控件等内联容器中的文字，
+        不包括文本框等嵌套段落中的文字（嵌套段落会单独处理）"""
+        return [t for t in p.iter(_W_T) if next(t.iterancestors(_W_P)) is p]
+    
+    def render(self, data):
+        """在内存中生成单个文档，返回 (文件名, 文档内容)"""
+        values = self.placeholders.copy()
+        for key, alias in self.fields.items():
+            if key in data:
+                value = data[key]
+                values[alias] = str(value) if value else ''
+        
+        # 控制字符无法写入XML，Word也无法打开这样的文档
+        for key, alias in self.fields.items():
+            if _XML_ILLEGAL_CHARS_RE.search(values[alias]):
+                raise ValueError(f"字段“{key}”中包含无法写入Word文档的控制字符")
+        
+        # 各节点的新文本与模板的其余XML片段依次拼接
+        pieces = self.document_pieces
+        parts = [pieces[0]]
+        for (fmt, escapes), piece in zip(self.formats, islice(pieces, 1, None)):
+            parts.append(fmt.format_map(values).translate(escapes).encode('utf-8'))
+            parts.append(piece)
+        document_xml = b''.join(parts)
+        
+        filename = self.build_filename(data)
+        
+        # 保存到内存，写盘可以与下一个文档的生成并行进行
+        buffer = BytesIO()
+        with ZipFile(buffer, 'w', compression=ZIP_DEFLATED, compresslevel=_DOCX_COMPRESS_LEVEL) as package:
+            for name, blob, compress_type in self.package_parts:
+                package.writestr(name, document_xml if name == self.document_partname else blob,
+                                 compress_type=compress_type)
+        return filename, buffer.getvalue()
+    
+    @staticmethod
+    def build_filename(data):
+        """生成文件名：学号_姓名_班级.docx，并清理文件名中的非法字符"""
+        parts = [str(data.get(key, 'unknown')) for key in _FILENAME_FIELDS]
+        return '_'.join(parts).translate(_ILLEGAL_FILENAME_TRANS) + '.docx'
+    
+    @staticmethod
+    def escape_format(text):
+        """转义format格式串中的花括号"""
+        return text.replace('{', '{{').replace('}', '}}')
+    
+    @staticmethod
+    def substitute_runs(texts, full_text, matches, replacements):
+        """按匹配结果生成每个w:t节点的格式字符串，处理占位符被分割在多个run中的情况
+        
+        替换字段写入占位符起始位置所在的节点，占位符的其余部分从后续节点中移除，
+        占位符之外的文字（已转义）留在原来的节点中，从而保持原有格式。
+        """
+        formats = []
+        matches = iter(zip(matches, replacements))
+        current = next(matches, None)
+        run_start = 0
+        
+        for text in texts:
+            run_end = run_start + len(text)
+            pieces = []
+            cursor = run_start
+            
+            while current is not None and current[0].start() < run_end:
+                match, replacement = current
+                if match.start() >= cursor:
+                    pieces.append(TemplateRenderer.escape_format(full_text[cursor:match.start()]))
+                    pieces.append(replacement)
+                if match.end() > run_end:
+                    # 占位符延续到下一个run
+                    cursor = run_end
+                    break
+                cursor = match.end()
+                current = next(matches, None)
+            
+            pieces.append(TemplateRenderer.escape_format(full_text[cursor:run_end]))
+            formats.append(''.join(pieces))
+            run_start = run_end
+        
+        return formats
+
+def write_file(path, content):
+    """一次性写入文件内容
+    
+    先写入临时文件再替换，中途取消或出错时不会留下不完整的文档。
+    临时文件名各不相同，多个进程同时写入同名文档时也不会互相影响。
+    """
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def submit_write(writer, last_writes, path, content):
+    """提交写盘任务并返回对应的Future
+    
+    同名文档（学号、姓名、班级都相同）不能同时写入同一个文件：先等待该路径上一次
+    写入完成，与逐个保存时一样由后生成的文档覆盖先生成的。last_writes记录各路径
+    最近一次的写入。
+    """
+    previous = last_writes.get(path)
+    if previous is not None:
+        previous.result()
+    write = last_writes[path] = writer.submit(write_file, path, content)
+    return write
+
+# 子进程中的模板渲染器和写盘线程池，由进程池初始化函数创建
+_worker_renderer = None
+_worker_writer = None
+
+def _init_render_worker(template_bytes):
+    """进程池初始化：每个子进程只解析一次模板"""
+    global _worker_renderer, _worker_writer
+    _worker_renderer = TemplateRenderer(template_bytes)
+    _worker_writer = ThreadPoolExecutor(max_workers=2)
+
+def _render_rows(rows, output_dir):
+    """在子进程中生成一组文档，返回生成的文件名列表
+    
+    写盘交给后台线程，与下一个文档的生成重叠进行；返回前等待本组全部写完。
+    """
+    filenames = []
+    writes = []
+    last_writes = {}
+    for row_data in rows:
+        filename, content = _worker_renderer.render(row_data)
+        writes.append(submit_write(_worker_writer, last_writes, os.path.join(output_dir, filename), content))
+        filenames.append(filename)
+    for write in writes:
+        write.result()
+    return filenames
+
 class WordGeneratorThread(QThread):
-    """Word文档生成线程"""
+    """Word文档生成线程
+    
+    构造时传入的行立即开始生成；expected_rows大于0时，生成过程中还可以通过
+    add_rows追加行（例如补全缺失字段后的记录），最后调用finish_input结束输入。
+    """
     progress = pyqtSignal(int)
     status = pyqtSignal(str)
     finished = pyqtSignal(int)
     error = pyqtSignal(str)
     
-    def __init__(self, data_rows, template_path, output_dir):
+    # 记录数达到该值时使用多进程并行生成，数量较少时进程启动开销得不偿失
+    # （每份文档约2~3毫秒，而每个子进程启动并解析模板约需0.2~0.3秒，Windows上更慢）
+    PARALLEL_MIN_ROWS = 300
+    # 并行生成时每个任务最多包含的行数，减少进程间通信次数
+    PARALLEL_CHUNK_ROWS = 8
+    # 串行生成时最多暂存在内存中等待写盘的文档数
+    MAX_PENDING_WRITES = 16
+    
+    def __init__(self, data_rows, template_path, output_dir, expected_rows=0):
         super().__init__()
-        self.data_rows = data_rows
         self.template_path = template_path
         self.output_dir = output_dir
         self.success_count = 0
-        
+        self.generated_files = []
+        self.total = len(data_rows) + expected_rows
+        self._submitted = 0
+        self._last_progress = -1
+        self._rows = queue.Queue()
+        self._cancel_event = threading.Event()
+        
+        # 模板只读取一次，之后每行都从内存中的字节重建文档
+        with open(template_path, 'rb') as f:
+            self._template_bytes = f.read()
+        
+        self.add_rows(data_rows)
+        if not expected_rows:
+            self.finish_input()
+    
+    def add_rows(self, data_rows):
+        """追加待生成的行"""
+        for row_data in data_rows:
+            self._submitted += 1
+            self._rows.put(row_data)
+    
+    def finish_input(self):
+        """不再追加新的行"""
+        self.total = self._submitted
+        self._rows.put(None)
+    
+    def cancel(self):
+        """取消尚未开始的生成任务"""
+        self._cancel_event.set()
+    
+    def accepting_rows(self):
+        """是否还在接收追加的行，已取消或生成线程已结束（例如出错）时返回False"""
+        return not self._cancel_event.is_set() and not self.isFinished()
+    
+    def iter_rows(self):
+        """依次取出待生成的行，直到输入结束或被取消"""
+        while not self._cancel_event.is_set():
+            row_data = self._rows.get()
+            # 等待期间可能已经取消
+            if row_data is None or self._cancel_event.is_set():
+                return
+            yield row_data
+    
+    def report_progress(self, done):
+        """进度百分比变化时才发出信号，避免大批量生成时信号过多"""
+        percent = min(100, done * 100 // max(self.total, 1))
+        if percent != self._last_progress:
+            self._last_progress = percent
+            self.progress.emit(percent)
+    
     def run(self):
         try:
-            total = len(self.data_rows)
-            for i, row_data in enumerate(self.data_rows):
-                self.status.emit(f"正在生成：{row_data.get('姓名', 'unknown')}")
-                
-                # 生成文档
-                self.generate_single_doc(row_data)
-                self.success_count += 1
-                
-                # 更新进度
-                progress = int((i + 1) / total * 100)
-                self.progress.emit(progress)
-                
+            # 留出一个核心给界面线程
+            workers = min(max(1, (os.cpu_count() or 1) - 1), self.total)
+            if workers > 1 and self.total >= self.PARALLEL_MIN_ROWS:
+                self.run_parallel(workers)
+            else:
+                self.run_serial()
+            
             self.finished.emit(self.success_count)
         except Exception as e:
             self.error.emit(str(e))
     
-    def generate_single_doc(self, data):
-        """生成单个文档"""
-        doc = Document(self.template_path)
-        
-        # 替换文档中的所有占位符
-        for paragraph in doc.paragraphs:
-            self.replace_text_in_paragraph(paragraph, data)
-        
-        # 替换表格中的占位符
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        self.replace_text_in_paragraph(paragraph, data)
-        
-        # 生成文件名
-        filename = f"{data.get('学号', 'unknown')}_{data.get('姓名', 'unknown')}_{data.get('班级', 'unknown')}.docx"
-        # 清理文件名中的非法字符
-        filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
-        
-        # 保存文档
-        output_path = os.path.join(self.output_dir, filename)
-        doc.save(output_path)
-    
-    def replace_text_in_paragraph(self, paragraph, data):
-        """替换段落中的占位符，保持原有格式"""
-        # 先检查整个段落文本中是否包含占位符
-        full_text = ''.join(run.text for run in paragraph.runs)
-        
-        for key, value in data.items():
-            placeholder = f"{{{{{key}}}}}"
-            if placeholder in full_text:
-                # 占位符可能被分割在多个run中，需要特殊处理
-                self.replace_placeholder_in_runs(paragraph.runs, placeholder, str(value) if value else '')
-    
-    def replace_placeholder_in_runs(self, runs, placeholder, replacement):
-        """在runs中替换占位符，处理占位符被分割的情况"""
-        text = ''
-        run_info = []
-        
-        # 收集所有run的文本和信息
-        for run in runs:
-            run_start = len(text)
-            text += run.text
-            run_end = len(text)
-            run_info.append({
-                'run': run,
-                'start': run_start,
-                'end': run_end,
-                'original_text': run.text
-            })
-        
-        # 查找并替换占位符
-        new_text = text.replace(placeholder, replacement)
-        
-        # 如果没有变化，直接返回
-        if new_text == text:
-            return
-        
-        # 计算需要调整的位置
-        placeholder_pos = text.find(placeholder)
-        if placeholder_pos == -1:
-            return
-        
-        # 找到占位符涉及的runs
-        affected_runs = []
-        for info in run_info:
-            if info['start'] <= placeholder_pos < info['end'] or \
-               info['start'] < placeholder_pos + len(placeholder) <= info['end'] or \
-               (info['start'] >= placeholder_pos and info['end'] <= placeholder_pos + len(placeholder)):
-                affected_runs.append(info)
-        
-        if affected_runs:
-            # 在第一个受影响的run中进行替换
-            first_run = affected_runs[0]['run']
-            
-            # 构建新的文本
-            before_placeholder = text[:placeholder_pos]
-            after_placeholder = text[placeholder_pos + len(placeholder):]
+    def run_serial(self):
+        """在当前线程中逐个生成，写盘交给后台线程"""
+        render = TemplateRenderer(self._template_bytes).render
+        emit_status = self.status.emit
+        report_progress = self.report_progress
+        output_dir = self.output_dir
+        with ThreadPoolExecutor(max_workers=4) as writer:
+            writes = deque()
+            last_writes = {}
+            for count, row_data in enumerate(self.iter_rows(), 1):
+                emit_status(f"正在生成：{row_data.get('姓名', 'unknown')}")
+                
+                # 生成文档
+                filename, content = render(row_data)
+                writes.append(submit_write(writer, last_writes, os.path.join(output_dir, filename), content))
+                # 写盘跟不上时等待最早的写入完成，避免生成好的文档在内存中越积越多
+                if len(writes) > self.MAX_PENDING_WRITES:
+                    writes.popleft().result()
+                self.generated_files.append(filename)
+                self.success_count = count
+                
+                # 更新进度
+                report_progress(count)
             
-            # 计算第一个run应该包含的文本
-            first_run_start = affected_runs[0]['start']
-            first_run_text_before = before_placeholder[first_run_start:] if first_run_start < len(before_placeholder) else ''
+            # 等待全部写入完成，写入失败时抛出异常
+            for write in writes:
+                write.result()
+    
+    def run_parallel(self, workers):
+        """使用进程池并行生成，按完成顺序更新进度"""
+        # 统一使用spawn方式创建子进程，避免在已启动Qt线程的进程中fork
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_init_render_worker,
+                                 initargs=(self._template_bytes,)) as executor:
+            futures = {}
+            # 每个进程分到若干个任务，进度才能均匀地更新
+            chunk_size = max(1, min(self.PARALLEL_CHUNK_ROWS, self.total // (workers * 4)))
+            max_pending = workers * 2
             
-            # 设置第一个run的新文本
-            first_run.text = first_run_text_before + replacement
+            def collect(done):
+                for future in done:
+                    self.generated_files.extend(future.result())
+                    rows = futures.pop(future)
+                    self.success_count += len(rows)
+                    self.status.emit(f"已生成：{rows[-1].get('姓名', 'unknown')}")
+                    self.report_progress(self.success_count)
             
-            # 处理剩余的文本
-            remaining_text_start = placeholder_pos + len(placeholder)
-            if len(affected_runs) > 1:
-                last_run = affected_runs[-1]
-                if last_run['end'] > remaining_text_start:
-                    # 如果最后一个受影响的run还有剩余文本
-                    remaining_in_last = after_placeholder[:last_run['end'] - remaining_text_start]
-                    first_run.text += remaining_in_last
+            try:
+                chunk = []
+                for row_data in self.iter_rows():
+                    chunk.append(row_data)
+                    # 凑满一组，或暂时没有更多的行（等待用户补全字段）时提交
+                    if len(chunk) >= chunk_size or self._rows.empty():
+                        futures[executor.submit(_render_rows, chunk, self.output_dir)] = chunk
+                        chunk = []
+                        # 顺便处理已经完成的任务；未完成的任务足够各进程忙碌时，等到有任务完成再继续提交
+                        if len(futures) >= max_pending:
+                            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                        else:
+                            done, _ = wait(futures, timeout=0)
+                        collect(done)
+                
+                if chunk and not self._cancel_event.is_set():
+                    futures[executor.submit(_render_rows, chunk, self.output_dir)] = chunk
                 
-                # 清空中间的runs
-                for info in affected_runs[1:]:
-                    info['run'].text = ''
+                while futures and not self._cancel_event.is_set():
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    collect(done)
+                
+                if futures:
+                    # 已取消：丢弃尚未开始的任务；已经开始的任务会写完文件，一并计入结果
+                    for future in futures:
+                        future.cancel()
+                    done, _ = wait(futures)
+                    collect([future for future in done if not future.cancelled()])
+            finally:
+                # 出错或取消时丢弃尚未开始的任务
+                for future in futures:
+                    future.cancel()
+
+class ExcelLoaderThread(QThread):
+    """Excel读取线程，读取较大的文件时界面不会卡住"""
+    loaded = pyqtSignal(object)
+    error = pyqtSignal(str)
+    
+    def __init__(self, reader, file_path):
+        super().__init__()
+        self.reader = reader
+        self.file_path = file_path
+    
+    def run(self):
+        try:
+            data = self.reader(self.file_path)
+            self.loaded.emit(data.fillna(''))  # 将NaN替换为空字符串
+        except Exception as e:
+            self.error.emit(str(e))
 
 class DocumentGenerator:
     """文档生成器类 - 提取通用的文档处理逻辑"""
     
-    @staticmethod
-    def replace_text_in_paragraph(paragraph, data):
-        """替换段落中的占位符，保持原有格式"""
-        # 先检查整个段落文本中是否包含占位符
-        full_text = ''.join(run.text for run in paragraph.runs)
-        
-        for key, value in data.items():
-            placeholder = f"{{{{{key}}}}}"
-            if placeholder in full_text:
-                # 占位符可能被分割在多个run中，需要特殊处理
-                DocumentGenerator.replace_placeholder_in_runs(paragraph.runs, placeholder, str(value) if value else '')
+    # 最近使用的模板渲染器 ((模板路径, 修改时间), 渲染器)，模板未修改时无需重新解析
+    _renderer_cache = None
     
     @staticmethod
-    def replace_placeholder_in_runs(runs, placeholder, replacement):
-        """在runs中替换占位符，处理占位符被分割的情况"""
-        text = ''
-        run_info = []
-        
-        # 收集所有run的文本和信息
-        for run in runs:
-            run_start = len(text)
-            text += run.text
-            run_end = len(text)
-            run_info.append({
-                'run': run,
-                'start': run_start,
-                'end': run_end,
-                'original_text': run.text
-            })
-        
-        # 查找并替换占位符
-        new_text = text.replace(placeholder, replacement)
-        
-        # 如果没有变化，直接返回
-        if new_text == text:
-            return
-        
-        # 计算需要调整的位置
-        placeholder_pos = text.find(placeholder)
-        if placeholder_pos == -1:
-            return
-        
-        # 找到占位符涉及的runs
-        affected_runs = []
-        for info in run_info:
-            if info['start'] <= placeholder_pos < info['end'] or \
-               info['start'] < placeholder_pos + len(placeholder) <= info['end'] or \
-               (info['start'] >= placeholder_pos and info['end'] <= placeholder_pos + len(placeholder)):
-                affected_runs.append(info)
-        
-        if affected_runs:
-            # 在第一个受影响的run中进行替换
-            first_run = affected_runs[0]['run']
-            
-            # 构建新的文本
-            before_placeholder = text[:placeholder_pos]
-            after_placeholder = text[placeholder_pos + len(placeholder):]
-            
-            # 计算第一个run应该包含的文本
-            first_run_start = affected_runs[0]['start']
-            first_run_text_before = before_placeholder[first_run_start:] if first_run_start < len(before_placeholder) else ''
-            
-            # 设置第一个run的新文本
-            first_run.text = first_run_text_before + replacement
-            
-            # 处理剩余的文本
-            remaining_text_start = placeholder_pos + len(placeholder)
-            if len(affected_runs) > 1:
-                last_run = affected_runs[-1]
-                if last_run['end'] > remaining_text_start:
-                    # 如果最后一个受影响的run还有剩余文本
-                    remaining_in_last = after_placeholder[:last_run['end'] - remaining_text_start]
-                    first_run.text += remaining_in_last
-                
-                # 清空中间的runs
-                for info in affected_runs[1:]:
-                    info['run'].text = ''
+    def get_renderer(template_path):
+        """获取模板渲染器，模板文件未修改时复用上次解析的结果"""
+        cache_key = (str(template_path), os.stat(template_path).st_mtime_ns)
+        cache = DocumentGenerator._renderer_cache
+        if cache is None or cache[0] != cache_key:
+            with open(template_path, 'rb') as f:
+                cache = (cache_key, TemplateRenderer(f.read()))
+            DocumentGenerator._renderer_cache = cache
+        return cache[1]
     
     @staticmethod
     def generate_document(template_path, data, output_path):
-        """生成单个文档的通用方法"""
+        """生成单个文档的通用方法，与批量生成共用同一套模板渲染逻辑"""
         try:
             # 加载模板
-            doc = Document(template_path)
+            renderer = DocumentGenerator.get_renderer(template_path)
             
-            # 替换段落中的占位符
-            for paragraph in doc.paragraphs:
-                DocumentGenerator.replace_text_in_paragraph(paragraph, data)
-            
-            # 替换表格中的占位符
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for paragraph in cell.paragraphs:
-                            DocumentGenerator.replace_text_in_paragraph(paragraph, data)
+            # 替换正文段落和表格中的占位符
+            _, content = renderer.render(data)
             
             # 保存文档
-            doc.save(output_path)
+            write_file(output_path, content)
             return True
             
         except Exception as e:
             raise Exception(f"生成文档时出错：{str(e)}")
 
+class PandasModel(QAbstractTableModel):
+    """基于DataFrame的表格模型 - 第0列为选择复选框，单元格文本在显示时才生成"""
+    
+    def __init__(self, df, parent=None):
+        import numpy as np
+        import pandas as pd
+        
+        super().__init__(parent)
+        self._df = df
+        # 单元格显示时用到的pandas函数和类型，创建模型时绑定一次
+        self._isna = pd.isna
+        self._datetime_types = (pd.Timestamp, datetime)
+        # 按列缓存单元格的值，显示时直接按下标取值，不必每个单元格都经过DataFrame索引
+        self._columns = [df.iloc[:, i].tolist() for i in range(len(df.columns))]
+        self._checked = np.zeros(len(df), dtype=bool)
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._df)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._df.columns) + 1
+    
+    def column_of(self, name):
+        """返回字段所在的表格列号，不存在时返回-1"""
+        if name in self._df.columns:
+            return self._df.columns.get_loc(name) + 1
+        return -1
+    
+    def cell_text(self, row, col):
+        """获取单元格的显示文本（col为表格列号）"""
+        value = self._columns[col - 1][row]
+        # 处理各种数据类型
+        if self._isna(value):
+            return ''
+        if isinstance(value, self._datetime_types):
+            # 格式化日期时间显示
+            return value.strftime('%Y/%m/%d %H:%M:%S')
+        return str(value)
+    
+    def row_data(self, row, names=None):
+        """获取一行数据 {列名: 显示文本}，指定names时只取这些列"""
+        return {str(name): self.cell_text(row, col) for col, name in enumerate(self._df.columns, 1)
+                if names is None or str(name) in names}
+    
+    def checked_rows(self):
+        """返回所有已勾选行的行号"""
+        import numpy as np
+        
+        return np.flatnonzero(self._checked).tolist()
+    
+    def set_all_checked(self, checked):
+        """一次性设置所有行的勾选状态"""
+        if not len(self._checked):
+            return
+        self._checked[:] = checked
+        self.dataChanged.emit(self.index(0, 0), self.index(len(self._checked) - 1, 0),
+                              [Qt.ItemDataRole.CheckStateRole])
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return '选择' if section == 0 else str(self._df.columns[section - 1])
+        return super().headerData(section, orientation, role)
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        
+        if index.column() == 0:
+            if role == Qt.ItemDataRole.CheckStateRole:
+                return Qt.CheckState.Checked if self._checked[index.row()] else Qt.CheckState.Unchecked
+            return None
+        
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return self.cell_text(index.row(), index.column())
+        return None
+    
+    def flags(self, index):
+        flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        if index.column() == 0:
+            return flags | Qt.ItemFlag.ItemIsUserCheckable
+        return flags | Qt.ItemFlag.ItemIsEditable
+    
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid():
+            return False
+        
+        if index.column() == 0:
+            if role != Qt.ItemDataRole.CheckStateRole:
+                return False
+            self._checked[index.row()] = Qt.CheckState(value) == Qt.CheckState.Checked
+        elif role == Qt.ItemDataRole.EditRole:
+            self._df.iat[index.row(), index.column() - 1] = value
+            self._columns[index.column() - 1][index.row()] = value
+        else:
+            return False
+        
+        self.dataChanged.emit(index, index, [role])
+        return True
+
 class ArchiveTransferGenerator(QMainWindow):
+    # xlsx文件达到该大小时改用流式读取，降低内存占用
+    STREAM_EXCEL_MIN_BYTES = 5 * 1024 * 1024
+    # 自动调整列宽时参考的行数
+    RESIZE_SAMPLE_ROWS = 200
+    
     def __init__(self):
         super().__init__()
         self.excel_data = None
+        self.table_model = None
         self.template_variables = None
         self.initUI()
         
@@ -409,12 +747,10 @@ class ArchiveTransferGenerator(QMainWindow):
         layout.addLayout(button_layout)
         
         # 数据表格
-        self.data_table = QTableWidget()
+        self.data_table = QTableView()
         self.data_table.setAlternatingRowColors(True)
         self.data_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.data_table.setEditTriggers(QAbstractItemView.EditTrigger.DoubleClicked)
-        # 当单元格内容改变时更新转档字号
-        self.data_table.itemChanged.connect(self.on_table_item_changed)
         layout.addWidget(self.data_table)
         
         tab.setLayout(layout)
@@ -432,38 +768,21 @@ class ArchiveTransferGenerator(QMainWindow):
         # 定义所有可能的字段
         self.manual_fields = {}
         field_list = [
-            ('姓名', '请输入姓名'),
-            ('学号', '请输入学号'),
-            ('班级', '请输入班级'),
-            ('届', '如：2023'),
-            ('年', '如：2025'),
-            ('月', '如：7'),
-            ('日', '如：15'),
-            ('身份证号', '请输入身份证号'),
-            ('收档单位名称', '请输入收档单位名称'),
-            ('转递编号', '请输入转递编号'),
-            ('生源地', '请输入生源地'),
-            ('手机号', '请输入手机号'),
-            ('档案转递类型', None),  # 将使用下拉框
-            ('就业单位名称', '请输入就业单位名称'),
-            ('就业单位地址', '请输入就业单位地址'),
+            '姓名', '学号', '班级', '届', '年', '月', '日', '身份证号', '收档单位名称',
+            '转递编号', '生源地', '手机号',
+            '档案转递类型',  # 将使用下拉框
+            '就业单位名称', '就业单位地址',
         ]
         
         row = 0
         col = 0
-        for field_name, placeholder in field_list:
+        for field_name in field_list:
             label = QLabel(f"{field_name}:")
             
             if field_name == '档案转递类型':
                 # 创建下拉框
                 combo_box = QComboBox()
-                combo_box.addItems([
-                    '',  # 空选项
-                    '转回生源地',
-                    '签约单位接收',
-                    '托管单位接收',
-                    '升学外校接收'
-                ])
+                combo_box.addItems(['', *_TRANSFER_TYPES])  # 第一项为空选项
                 combo_box.setEditable(True)  # 允许自定义输入
                 combo_box.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)  # 不自动添加到列表
                 self.manual_fields[field_name] = combo_box
@@ -472,7 +791,7 @@ class ArchiveTransferGenerator(QMainWindow):
             else:
                 # 创建普通输入框
                 line_edit = QLineEdit()
-                line_edit.setPlaceholderText(placeholder)
+                line_edit.setPlaceholderText(_FIELD_HINTS.get(field_name, (f'请输入{field_name}', None))[0])
                 self.manual_fields[field_name] = line_edit
                 form_layout.addWidget(label, row, col * 2)
                 form_layout.addWidget(line_edit, row, col * 2 + 1)
@@ -730,67 +1049,45 @@ class ArchiveTransferGenerator(QMainWindow):
         tab.setLayout(main_layout)
         return tab
     
-    def on_table_item_changed(self, item):
-        """当表格项改变时触发"""
-        if not item:
+    def on_table_data_changed(self, top_left, bottom_right, roles=()):
+        """当表格数据改变时触发"""
+        if top_left.column() != bottom_right.column():
             return
         
-        row = item.row()
-        col = item.column()
-        
         # 获取列标题
-        header = self.data_table.horizontalHeaderItem(col)
-        if not header:
-            return
-        
-        column_name = header.text()
+        column_name = self.table_model.headerData(top_left.column(), Qt.Orientation.Horizontal)
         
         # 如果修改的是年、学号或班级列，更新转档字号
         if column_name in ['年', '学号', '班级']:
-            self.update_transfer_number_for_row(row)
+            for row in range(top_left.row(), bottom_right.row() + 1):
+                self.update_transfer_number_for_row(row)
     
     def update_transfer_number_for_row(self, row):
         """更新指定行的转档字号"""
-        # 查找年、学号、班级列的索引
-        year_col = month_col = day_col = student_id_col = class_col = transfer_col = -1
-        
-        for col in range(self.data_table.columnCount()):
-            header = self.data_table.horizontalHeaderItem(col)
-            if header:
-                header_text = header.text()
-                if header_text == '年':
-                    year_col = col
-                elif header_text == '月':
-                    month_col = col
-                elif header_text == '日':
-                    day_col = col
-                elif header_text == '学号':
-                    student_id_col = col
-                elif header_text == '班级':
-                    class_col = col
-                elif header_text == '转档字号':
-                    transfer_col = col
+        model = self.table_model
+        if model is None:
+            return
+        
+        # 查找年、学号、班级、转档字号列的索引
+        year_col = model.column_of('年')
+        student_id_col = model.column_of('学号')
+        class_col = model.column_of('班级')
+        transfer_col = model.column_of('转档字号')
         
         # 如果找到了所有必要的列
         if year_col >= 0 and student_id_col >= 0 and class_col >= 0:
-            year_item = self.data_table.item(row, year_col)
-            student_id_item = self.data_table.item(row, student_id_col)
-            class_item = self.data_table.item(row, class_col)
+            year = model.cell_text(row, year_col).strip()
+            student_id = model.cell_text(row, student_id_col).strip()
+            class_name = model.cell_text(row, class_col).strip()
             
-            if year_item and student_id_item and class_item:
-                year = year_item.text().strip()
-                student_id = student_id_item.text().strip()
-                class_name = class_item.text().strip()
+            if year and student_id and class_name:
+                # 生成转档字号：年份后两位 + 学号 + _ + 班级
+                year_suffix = year[-2:] if len(year) >= 2 else year
+                transfer_number = f"{year_suffix}{student_id}_{class_name}"
                 
-                if year and student_id and class_name:
-                    # 生成转档字号：年份后两位 + 学号 + _ + 班级
-                    year_suffix = year[-2:] if len(year) >= 2 else year
-                    transfer_number = f"{year_suffix}{student_id}_{class_name}"
-                    
-                    # 如果转档字号列存在，更新它
-                    if transfer_col >= 0:
-                        transfer_item = QTableWidgetItem(transfer_number)
-                        self.data_table.setItem(row, transfer_col, transfer_item)
+                # 如果转档字号列存在，更新它
+                if transfer_col >= 0:
+                    model.setData(model.index(row, transfer_col), transfer_number)
     
     def load_excel(self):
         """加载Excel文件"""
@@ -802,29 +1099,132 @@ class ArchiveTransferGenerator(QMainWindow):
         )
         
         if file_path:
+            # 在后台线程中读取Excel文件，读取期间不允许重复加载
+            self.load_excel_btn.setEnabled(False)
+            self.statusBar().showMessage('正在读取Excel文件...')
+            
+            self.excel_loader = ExcelLoaderThread(self.read_excel_file, file_path)
+            self.excel_loader.loaded.connect(self.on_excel_loaded)
+            self.excel_loader.error.connect(self.on_excel_load_error)
+            self.excel_loader.start()
+    
+    def on_excel_loaded(self, data):
+        """Excel读取完成处理"""
+        self.load_excel_btn.setEnabled(True)
+        try:
+            self.excel_data = data
+            
+            # 处理日期字段，提取年月日
+            self.process_date_fields()
+            
+            # 显示数据到表格
+            self.display_data()
+            
+            # 启用按钮
+            self.select_all_btn.setEnabled(True)
+            self.deselect_all_btn.setEnabled(True)
+            self.generate_btn.setEnabled(True)
+            
+            self.statusBar().showMessage(f'已加载 {len(self.excel_data)} 条记录')
+            
+        except Exception as e:
+            self.on_excel_load_error(str(e))
+    
+    def on_excel_load_error(self, error_msg):
+        """Excel读取错误处理"""
+        self.load_excel_btn.setEnabled(True)
+        QMessageBox.critical(self, "错误", f"读取Excel文件失败：\n{error_msg}")
+        self.statusBar().showMessage('读取失败')
+    
+    def read_excel_file(self, file_path):
+        """读取Excel文件的第一个工作表
+        
+        优先使用calamine引擎；未安装时较大的xlsx文件使用只读模式流式读取。
+        """
+        import pandas as pd
+        
+        text_dtypes = {column: str for column in _TEXT_COLUMNS}
+        if _CALAMINE_AVAILABLE:
             try:
-                # 读取Excel文件
-                self.excel_data = pd.read_excel(file_path)
-                self.excel_data = self.excel_data.fillna('')  # 将NaN替换为空字符串
-                
-                # 处理日期字段，提取年月日
-                self.process_date_fields()
-                
-                # 显示数据到表格
-                self.display_data()
-                
-                # 启用按钮
-                self.select_all_btn.setEnabled(True)
-                self.deselect_all_btn.setEnabled(True)
-                self.generate_btn.setEnabled(True)
-                
-                self.statusBar().showMessage(f'已加载 {len(self.excel_data)} 条记录')
-                
-            except Exception as e:
-                QMessageBox.critical(self, "错误", f"读取Excel文件失败：\n{str(e)}")
+                return pd.read_excel(file_path, engine='calamine', dtype=text_dtypes)
+            except ValueError:
+                # pandas 2.2以下不支持calamine引擎，改用openpyxl读取
+                pass
+        if file_path.lower().endswith('.xlsx') and os.path.getsize(file_path) >= self.STREAM_EXCEL_MIN_BYTES:
+            return self.read_excel_streaming(file_path)
+        return pd.read_excel(file_path, dtype=text_dtypes)
+    
+    def read_excel_streaming(self, file_path):
+        """使用openpyxl只读模式逐块读取，不加载单元格格式"""
+        import numpy as np
+        import pandas as pd
+        from openpyxl import load_workbook
+        
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return pd.DataFrame()
+            names = [f'Unnamed: {i}' if name is None else str(name) for i, name in enumerate(header)]
+            columns = self.dedup_columns(names, [i for i, name in enumerate(header) if name is None])
+            
+            chunks = []
+            while True:
+                chunk = list(islice(rows, 10000))
+                if not chunk:
+                    break
+                chunks.append(pd.DataFrame(chunk, columns=columns, dtype=object))
+        finally:
+            workbook.close()
+        
+        if not chunks:
+            return pd.DataFrame(columns=columns)
+        df = pd.concat(chunks, ignore_index=True)
+        
+        # 去掉末尾的空行
+        non_empty = np.flatnonzero(df.notna().any(axis=1).to_numpy())
+        df = df.iloc[:non_empty[-1] + 1] if len(non_empty) else df.iloc[:0]
+        
+        # 重复的文本列（如“学号.1”）同样按文本读取
+        for column, name in zip(columns, names):
+            if name in _TEXT_COLUMNS:
+                df[column] = df[column].map(self.cell_to_text)
+        return df.infer_objects()
+    
+    @staticmethod
+    def cell_to_text(value):
+        """单元格值转为文本，整数形式的小数不带“.0”（与pandas读取结果一致）"""
+        if value is None:
+            return None
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value)
+    
+    @staticmethod
+    def dedup_columns(names, unnamed_indices=()):
+        """重复的列名依次加上“.1”“.2”等后缀（与pandas读取结果一致）
+        
+        先处理有列名的列，再处理空列名生成的“Unnamed: n”；表头中已有的名称不会被后缀占用。
+        """
+        columns = list(names)
+        counts = {}
+        order = [i for i in range(len(columns)) if i not in unnamed_indices] + list(unnamed_indices)
+        for i in order:
+            name = column = columns[i]
+            count = counts.get(name, 0)
+            while count > 0:
+                counts[name] = count + 1
+                column = f'{name}.{count}'
+                count = count + 1 if column in columns else counts.get(column, 0)
+            columns[i] = column
+            counts[column] = count + 1
+        return columns
     
     def process_date_fields(self):
         """处理日期字段，提取年月日"""
+        import pandas as pd
+        
         if self.excel_data is None:
             return
         
@@ -840,101 +1240,71 @@ class ArchiveTransferGenerator(QMainWindow):
         if not date_field:
             return
         
-        # 提取年月日
-        for idx, row in self.excel_data.iterrows():
-            date_value = row[date_field]
-            if date_value and not pd.isna(date_value):
-                try:
-                    # 如果是datetime对象
-                    if hasattr(date_value, 'year'):
-                        self.excel_data.at[idx, '年'] = str(date_value.year)  # 完整年份
-                        self.excel_data.at[idx, '月'] = str(date_value.month)
-                        self.excel_data.at[idx, '日'] = str(date_value.day)
-                    else:
-                        # 如果是字符串
-                        date_str = str(date_value).strip()
-                        if ' ' in date_str:
-                            date_part = date_str.split(' ')[0]
-                        else:
-                            date_part = date_str
-                        
-                        if '/' in date_part:
-                            parts = date_part.split('/')
-                            if len(parts) >= 3:
-                                self.excel_data.at[idx, '年'] = parts[0].strip()  # 完整年份
-                                self.excel_data.at[idx, '月'] = str(int(parts[1])) if parts[1].isdigit() else parts[1]
-                                self.excel_data.at[idx, '日'] = str(int(parts[2])) if parts[2].isdigit() else parts[2]
-                        elif '-' in date_part:
-                            parts = date_part.split('-')
-                            if len(parts) >= 3:
-                                self.excel_data.at[idx, '年'] = parts[0].strip()  # 完整年份
-                                self.excel_data.at[idx, '月'] = str(int(parts[1])) if parts[1].isdigit() else parts[1]
-                                self.excel_data.at[idx, '日'] = str(int(parts[2])) if parts[2].isdigit() else parts[2]
-                except:
-                    pass
+        # 提取年月日：整列一次性处理，不含完整年月日的值（如只有时间或年月）保留原值
+        # 先转为文本再拆分，日期时间对象转为文本后同样是“年-月-日”开头
+        text = self.excel_data[date_field].astype(str)
+        
+        # 按“年/月/日”或“年-月-日”拆分，年份保留完整四位，月、日去掉前导0
+        extracted = text.str.extract(_DATE_PARTS_RE)
+        year = extracted[0]
+        month = extracted[2].str.lstrip('0').replace('', '0')
+        day = extracted[3].str.lstrip('0').replace('', '0')
+        
+        valid = year.notna()
+        if valid.any():
+            for column, part in (('年', year), ('月', month), ('日', day)):
+                if column in self.excel_data.columns:
+                    current = self.excel_data[column]
+                else:
+                    current = pd.Series('', index=self.excel_data.index)
+                self.excel_data[column] = part.where(valid, current)
         
         # 生成转档字号
         if '年' in self.excel_data.columns and '学号' in self.excel_data.columns and '班级' in self.excel_data.columns:
-            for idx, row in self.excel_data.iterrows():
-                year = str(row['年']) if pd.notna(row['年']) else ''
-                student_id = str(row['学号']) if pd.notna(row['学号']) else ''
-                class_name = str(row['班级']) if pd.notna(row['班级']) else ''
-                
-                if year and student_id and class_name:
-                    # 转档字号使用年份后两位
-                    year_suffix = year[-2:] if len(year) >= 2 else year
-                    self.excel_data.at[idx, '转档字号'] = f"{year_suffix}{student_id}_{class_name}"
+            year, student_id, class_name = (
+                self.excel_data[column].where(self.excel_data[column].notna(), '').astype(str)
+                for column in ('年', '学号', '班级')
+            )
+            complete = (year != '') & (student_id != '') & (class_name != '')
+            if complete.any():
+                if '转档字号' in self.excel_data.columns:
+                    current = self.excel_data['转档字号']
+                else:
+                    current = pd.Series('', index=self.excel_data.index)
+                # 转档字号使用年份后两位
+                transfer_number = year.str[-2:] + student_id + '_' + class_name
+                self.excel_data['转档字号'] = transfer_number.where(complete, current)
     
     def display_data(self):
         """显示数据到表格"""
         if self.excel_data is None:
             return
         
-        # 设置表格
-        self.data_table.setRowCount(len(self.excel_data))
-        self.data_table.setColumnCount(len(self.excel_data.columns) + 1)
+        # 表格模型直接使用DataFrame中的数据，编辑后写回DataFrame
+        self.excel_data = self.excel_data.astype(object)
         
-        # 设置表头
-        headers = ['选择'] + list(self.excel_data.columns)
-        self.data_table.setHorizontalHeaderLabels(headers)
-        
-        # 填充数据
-        for row_idx, row_data in self.excel_data.iterrows():
-            # 添加复选框
-            checkbox = QTableWidgetItem()
-            checkbox.setCheckState(Qt.CheckState.Unchecked)
-            self.data_table.setItem(row_idx, 0, checkbox)
-            
-            # 添加数据
-            for col_idx, value in enumerate(row_data):
-                # 处理各种数据类型
-                if pd.isna(value):
-                    item_text = ''
-                elif isinstance(value, (pd.Timestamp, datetime)):
-                    # 格式化日期时间显示
-                    item_text = value.strftime('%Y/%m/%d %H:%M:%S') if hasattr(value, 'strftime') else str(value)
-                else:
-                    item_text = str(value)
-                item = QTableWidgetItem(item_text)
-                self.data_table.setItem(row_idx, col_idx + 1, item)
+        old_model = self.table_model
+        self.table_model = PandasModel(self.excel_data, self)
+        # 当单元格内容改变时更新转档字号
+        self.table_model.dataChanged.connect(self.on_table_data_changed)
+        self.data_table.setModel(self.table_model)
+        if old_model is not None:
+            old_model.deleteLater()
         
-        # 调整列宽
+        # 调整列宽，只按前若干行估算，避免为整张表格逐个格式化单元格
+        self.data_table.horizontalHeader().setResizeContentsPrecision(self.RESIZE_SAMPLE_ROWS)
         self.data_table.resizeColumnsToContents()
         self.data_table.horizontalHeader().setStretchLastSection(True)
     
     def select_all(self):
         """全选"""
-        for row in range(self.data_table.rowCount()):
-            item = self.data_table.item(row, 0)
-            if item:
-                item.setCheckState(Qt.CheckState.Checked)
+        if self.table_model is not None:
+            self.table_model.set_all_checked(True)
     
     def deselect_all(self):
         """取消全选"""
-        for row in range(self.data_table.rowCount()):
-            item = self.data_table.item(row, 0)
-            if item:
-                item.setCheckState(Qt.CheckState.Unchecked)
+        if self.table_model is not None:
+            self.table_model.set_all_checked(False)
     
     def get_template_variables(self):
         """获取模板中的变量"""
@@ -954,53 +1324,22 @@ class ArchiveTransferGenerator(QMainWindow):
         template_path = template_files[0]
         
         try:
-            doc = Document(template_path)
-            variables = set()
-            
-            # 查找段落中的变量
-            for paragraph in doc.paragraphs:
-                # 获取段落的完整文本（合并所有runs）
-                full_text = ''.join(run.text for run in paragraph.runs) if paragraph.runs else paragraph.text
-                variables.update(re.findall(r'\{\{(\w+)\}\}', full_text))
-            
-            # 查找表格中的变量
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for paragraph in cell.paragraphs:
-                            # 获取段落的完整文本（合并所有runs）
-                            full_text = ''.join(run.text for run in paragraph.runs) if paragraph.runs else paragraph.text
-                            variables.update(re.findall(r'\{\{(\w+)\}\}', full_text))
-            
-            return template_path, variables
+            # 模板解析结果会被缓存，模板文件未修改时不会重复读取
+            renderer = DocumentGenerator.get_renderer(template_path)
+            return template_path, renderer.variables
         except Exception as e:
             QMessageBox.critical(self, "错误", f"读取模板文件失败：\n{str(e)}")
             return None
     
-    def get_row_data_from_table(self, row_idx):
-        """从表格获取指定行的数据"""
-        data = {}
-        
-        # 获取所有列的数据（跳过第一列的复选框）
-        for col in range(1, self.data_table.columnCount()):
-            header = self.data_table.horizontalHeaderItem(col)
-            if header:
-                column_name = header.text()
-                item = self.data_table.item(row_idx, col)
-                if item:
-                    data[column_name] = item.text()
-                else:
-                    data[column_name] = ''
-        
-        return data
+    def get_row_data_from_table(self, row_idx, fields=None):
+        """从表格获取指定行的数据，指定fields时只取这些字段"""
+        # 列名直接取自模型中的DataFrame，不再逐列查询表头
+        return self.table_model.row_data(row_idx, fields)
     
     def batch_generate(self):
         """批量生成Word文档"""
         # 获取选中的行
-        selected_rows = []
-        for row in range(self.data_table.rowCount()):
-            if self.data_table.item(row, 0).checkState() == Qt.CheckState.Checked:
-                selected_rows.append(row)
+        selected_rows = self.table_model.checked_rows() if self.table_model is not None else []
         
         if not selected_rows:
             QMessageBox.warning(self, "警告", "请至少选择一行数据")
@@ -1018,69 +1357,100 @@ class ArchiveTransferGenerator(QMainWindow):
         if not output_dir:
             return
         
-        # 准备数据 - 直接从表格获取数据
+        # 准备数据 - 直接从表格获取数据，字段齐全的行可以先开始生成
         data_rows = []
+        pending_rows = []
+        # 生成时只用到模板字段和文件名中的字段，其余列不必传给生成线程
+        fields = template_variables.union(_FILENAME_FIELDS)
+        # 表格中没有的字段每行都缺失，只需逐行检查表格中有的字段
+        sheet_fields = {str(name) for name in self.excel_data.columns}
+        always_missing = template_variables.difference(sheet_fields)
+        checked_fields = template_variables.intersection(sheet_fields)
         
         for row_idx in selected_rows:
             # 直接从表格获取当前显示的数据
-            row_data = self.get_row_data_from_table(row_idx)
+            row_data = self.get_row_data_from_table(row_idx, fields)
             
             # 检查缺失的必要字段
-            missing_fields = set()
-            for field in template_variables:
-                if field not in row_data or not row_data[field]:
-                    missing_fields.add(field)
-            
-            # 如果有缺失字段，弹出对话框让用户补全
+            missing_fields = always_missing.union(field for field in checked_fields if not row_data[field])
             if missing_fields:
-                # 显示当前记录信息
-                info_for_dialog = {
-                    '姓名': row_data.get('姓名', 'N/A'),
-                    '学号': row_data.get('学号', 'N/A'),
-                    '班级': row_data.get('班级', 'N/A')
-                }
-                
-                dialog = MissingFieldsDialog(missing_fields, info_for_dialog, self)
-                if dialog.exec() == QDialog.DialogCode.Accepted:
-                    # 获取用户填写的值
-                    filled_values = dialog.get_values()
-                    
-                    # 更新数据
-                    for field, value in filled_values.items():
-                        if value:  # 只更新非空值
-                            row_data[field] = value
-                            
-                            # 同时更新表格显示
-                            for col in range(1, self.data_table.columnCount()):
-                                header = self.data_table.horizontalHeaderItem(col)
-                                if header and header.text() == field:
-                                    item = QTableWidgetItem(value)
-                                    self.data_table.setItem(row_idx, col, item)
-                                    break
-                    
-                    # 如果用户填写了年、学号或班级，更新转档字号
-                    if any(key in filled_values for key in ['年', '学号', '班级']):
-                        self.update_transfer_number_for_row(row_idx)
-                        # 重新获取更新后的数据
-                        row_data = self.get_row_data_from_table(row_idx)
-                else:
-                    # 用户取消了，但仍然可以选择继续（字段留空）
-                    reply = QMessageBox.question(
-                        self,
-                        "跳过此记录",
-                        f"学号：{info_for_dialog['学号']} 姓名：{info_for_dialog['姓名']}\n\n是否跳过此记录？\n\n选择“是”跳过此记录，选择“否”将缺失字段留空继续生成。",
-                        QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
-                    )
-                    if reply == QMessageBox.StandardButton.Yes:
-                        continue  # 跳过这条记录
-                    # 否则继续，缺失字段留空
-            
-            data_rows.append(row_data)
+                pending_rows.append((row_idx, row_data, missing_fields))
+            else:
+                data_rows.append(row_data)
+        
+        # 先生成字段齐全的行，用户补全缺失字段的同时后台继续生成
+        generator_thread = None
+        if data_rows:
+            generator_thread = self.start_generation(data_rows, template_path, output_dir, len(pending_rows))
+        
+        completed_rows = []
+        for row_idx, row_data, missing_fields in pending_rows:
+            # 生成已取消或出错结束后，不再询问剩余记录
+            if generator_thread is not None and not generator_thread.accepting_rows():
+                break
+            row_data = self.complete_missing_fields(row_idx, row_data, missing_fields)
+            if row_data is None:
+                continue  # 跳过这条记录
+            if generator_thread is not None:
+                generator_thread.add_rows([row_data])
+            else:
+                completed_rows.append(row_data)
+        
+        if generator_thread is not None:
+            generator_thread.finish_input()
+            return
         
-        if not data_rows:
+        if not completed_rows:
             QMessageBox.warning(self, "警告", "没有要生成的数据")
             return
         
+        self.start_generation(completed_rows, template_path, output_dir)
+    
+    def complete_missing_fields(self, row_idx, row_data, missing_fields):
+        """弹出对话框补全缺失字段，返回补全后的行数据，跳过此记录时返回None"""
+        # 显示当前记录信息
+        info_for_dialog = {
+            '姓名': row_data.get('姓名', 'N/A'),
+            '学号': row_data.get('学号', 'N/A'),
+            '班级': row_data.get('班级', 'N/A')
+        }
+        
+        dialog = MissingFieldsDialog(missing_fields, info_for_dialog, self)
+        if dialog.exec() == QDialog.DialogCode.Accepted:
+            # 获取用户填写的值
+            filled_values = dialog.get_values()
+            
+            # 更新数据
+            for field, value in filled_values.items():
+                if value:  # 只更新非空值
+                    row_data[field] = value
+                    
+                    # 同时更新表格显示
+                    col = self.table_model.column_of(field)
+                    if col >= 0:
+                        self.table_model.setData(self.table_model.index(row_idx, col), value)
+            
+            # 如果用户填写了年、学号或班级，更新转档字号
+            if any(key in filled_values for key in ['年', '学号', '班级']):
+                self.update_transfer_number_for_row(row_idx)
+                # 重新获取更新后的数据
+                row_data = self.get_row_data_from_table(row_idx, row_data.keys() | filled_values.keys())
+            return row_data
+        
+        # 用户取消了，但仍然可以选择继续（字段留空）
+        reply = QMessageBox.question(
+            self,
+            "跳过此记录",
+            f"学号：{info_for_dialog['学号']} 姓名：{info_for_dialog['姓名']}\n\n是否跳过此记录？\n\n选择“是”跳过此记录，选择“否”将缺失字段留空继续生成。",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if reply == QMessageBox.StandardButton.Yes:
+            return None
+        # 否则继续，缺失字段留空
+        return row_data
+    
+    def start_generation(self, data_rows, template_path, output_dir, expected_rows=0):
+        """显示进度对话框并启动生成线程"""
         # 创建进度对话框
         progress_dialog = QProgressDialog("正在生成Word文档...", "取消", 0, 100, self)
         progress_dialog.setWindowTitle("批量生成进度")
@@ -1088,17 +1458,25 @@ class ArchiveTransferGenerator(QMainWindow):
         progress_dialog.show()
         
         # 创建并启动生成线程
-        self.generator_thread = WordGeneratorThread(data_rows, template_path, output_dir)
+        self.generator_thread = WordGeneratorThread(data_rows, template_path, output_dir, expected_rows)
+        progress_dialog.canceled.connect(self.generator_thread.cancel)
         self.generator_thread.progress.connect(progress_dialog.setValue)
         self.generator_thread.status.connect(lambda msg: progress_dialog.setLabelText(msg))
         self.generator_thread.finished.connect(lambda count: self.on_generation_finished(count, progress_dialog))
         self.generator_thread.error.connect(lambda msg: self.on_generation_error(msg, progress_dialog))
         self.generator_thread.start()
+        return self.generator_thread
     
     def on_generation_finished(self, count, progress_dialog):
         """生成完成处理"""
         progress_dialog.close()
-        QMessageBox.information(self, "完成", f"成功生成 {count} 个Word文档")
+        
+        # 只弹出一次汇总对话框，生成的文件列表放在详细信息中
+        message_box = QMessageBox(QMessageBox.Icon.Information, "完成", f"成功生成 {count} 个Word文档",
+                                  QMessageBox.StandardButton.Ok, self)
+        if self.generator_thread.generated_files:
+            message_box.setDetailedText('\n'.join(self.generator_thread.generated_files))
+        message_box.exec()
         self.statusBar().showMessage(f'成功生成 {count} 个文档')
     
     def on_generation_error(self, error_msg, progress_dialog):
@@ -1159,7 +1537,7 @@ class ArchiveTransferGenerator(QMainWindow):
             data['转档字号'] = f"{year_suffix}{data['学号']}_{data['班级']}"
         
         # 检查模板中的其他变量
-        missing_fields = template_variables - set(data.keys())
+        missing_fields = template_variables.difference(data)
         if missing_fields:
             reply = QMessageBox.question(
                 self, 
@@ -1171,8 +1549,7 @@ class ArchiveTransferGenerator(QMainWindow):
                 return
             
             # 将缺失字段设为空
-            for field in missing_fields:
-                data[field] = ''
+            data.update(dict.fromkeys(missing_fields, ''))
         
         # 选择输出目录
         output_dir = QFileDialog.getExistingDirectory(self, "选择输出目录")
@@ -1181,8 +1558,7 @@ class ArchiveTransferGenerator(QMainWindow):
         
         try:
             # 生成文件名
-            filename = f"{data.get('学号', 'unknown')}_{data.get('姓名', 'unknown')}_{data.get('班级', 'unknown')}.docx"
-            filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
+            filename = TemplateRenderer.build_filename(data)
             output_path = os.path.join(output_dir, filename)
             
             # 使用统一的文档生成方法
@@ -1195,6 +1571,9 @@ class ArchiveTransferGenerator(QMainWindow):
             QMessageBox.critical(self, "错误", f"生成文档失败：\n{str(e)}")
 
 def main():
+    # 打包为exe后，进程池的子进程需要由此进入
+    multiprocessing.freeze_support()
+    
     app = QApplication(sys.argv)
     app.setStyle('Fusion')
     